@@ -4,6 +4,7 @@ from __future__ import print_function
 
 import re
 import git
+import heapq
 import logging
 import argparse
 import os
@@ -21,6 +22,7 @@ DATETIME_FORMAT = "%Y-%m-%d_%H-%M-%S"
 EMPTY_TREE_SHA = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
 DEFAULT_DEV_FILENAME = "_dev_comments.csv"
 DEFAULT_STATS_FILENAME = "_repo_stats.csv"
+TOP_K_CAPACITY_FACTOR = 10
 
 
 class DevProcessor:
@@ -30,22 +32,52 @@ class DevProcessor:
     the repository found within C++ files.
     """
 
-    def __init__(self, repo_path):
+    def __init__(self, repo_path, top_k=None, top_k_capacity=None):
+        """DevProcessor Init.
+        :param str repo_path: path of the repository to process
+        :param int top_k: if given, only report the top_k developers by diff
+            count, selected with a fixed size SpaceSaving summary instead of
+            storing every diff of every developer
+        :param int top_k_capacity: number of developers tracked by the
+            SpaceSaving summary, TOP_K_CAPACITY_FACTOR * top_k by default
+        """
+        if top_k is not None:
+            if top_k < 1:
+                raise ValueError("top_k must be a positive integer")
+            if top_k_capacity is None:
+                top_k_capacity = TOP_K_CAPACITY_FACTOR * top_k
+            elif top_k_capacity < top_k:
+                raise ValueError("top_k_capacity must be at least top_k")
         self._repo = git.Repo(path=repo_path)
         self._repo_path = repo_path
         self._repo_name = os.path.basename(self._repo.working_dir)
         self._developers = []
+        self._top_k = top_k
+        self._heavy_hitters = None
+        self._candidates = []
+        self._guarantee_threshold = 0
+        if top_k is not None:
+            self._heavy_hitters = SpaceSaving(top_k_capacity)
 
     @property
     def repo_path(self):
         return self._repo_path
 
+    @property
+    def top_k(self):
+        return self._top_k
+
     @property
     def developers(self):
         return self._developers
 
     def process_devs(self):
-        """Builds list of developers and all of their comments."""
+        """Builds list of developers and all of their comments.
+
+        When only tracking the top developers, the diffs are counted in the
+        SpaceSaving summary and the top candidates are then counted exactly by
+        _count_top_devs.
+        """
         commits = list(self._repo.iter_commits())
         commits.reverse()
         progress = ProgressBar(total=len(commits))
@@ -70,6 +102,11 @@ class DevProcessor:
             process_commit_log = "\n".join([log_intro, log_commit_msg, "="*len(commit_msg)])
             logger.debug(process_commit_log)
 
+            if self._heavy_hitters:
+                for diff in diffs:
+                    self._heavy_hitters.add(name)
+                continue
+
             dev_index = self._find_dev(name)
             if dev_index >= 0:
                 developer = self._developers[dev_index]
@@ -81,9 +118,48 @@ class DevProcessor:
                 logger.debug("Processing diff {}".format(diff))
                 developer.add_diff(diff, commit)
 
+        if self._heavy_hitters:
+            self._count_top_devs(commits)
+
+    def _count_top_devs(self, commits):
+        """Count the diffs of the top candidates of the SpaceSaving summary.
+
+        Commits by any other developer are skipped before extracting their
+        diffs, so only top_k DevSummary are kept in memory.
+        """
+        ranked = self._heavy_hitters.summaries()
+        self._candidates = ranked[:self._top_k]
+        self._guarantee_threshold = \
+            self._heavy_hitters.guarantee_threshold(ranked, self._top_k)
+
+        developers = dict((name, None) for name, _, _ in self._candidates)
+        for commit in commits:
+            name = commit.author.name.encode('utf-8')
+            if name not in developers:
+                continue
+
+            diffs = self._extract_diffs(commit)
+            if not diffs:
+                continue
+
+            developer = developers[name]
+            if developer is None:
+                email = commit.author.email.encode('utf-8')
+                developer = developers[name] = DevSummary(name, email)
+
+            for diff in diffs:
+                logger.debug("Processing diff {}".format(diff))
+                developer.add_diff(Diff(diff, commit))
+
+        self._developers = [developers[name] for name, _, _ in self._candidates]
 
     def export_dev_csv(self, directory=None):
         """Stores all the comments made by each developer in a .csv file."""
+        if self._heavy_hitters:
+            print("Comments are not stored when only tracking the top "
+                  "developers, skipping developer comments export.")
+            return
+
         if not self._developers:
             print("First execute 'process_devs()' to collect developer data.")
 
@@ -111,6 +187,9 @@ class DevProcessor:
 
         Metrics: diff count, comment count, modified line count, ratio of
             comments per modified line.
+
+        When only tracking the top developers, see _write_top_k_ratios for
+        the metrics and their error bounds.
         """
         if not self._developers:
             print("First execute 'process_devs()' to collect developer data.")
@@ -126,6 +205,9 @@ class DevProcessor:
             writer.writerow([])
             writer.writerow(["The commit count is gathered from commits with C++ "
                              "files and do not contain merges."])
+            if self._heavy_hitters:
+                self._write_top_k_ratios(writer)
+                return
             writer.writerow(["Developer", "Diffs", "Comments", "Modified Lines",
                              "Ratio (Comments/Modified Lines)"])
             for dev in self._developers:
@@ -136,6 +218,34 @@ class DevProcessor:
                 ratio = (float(comments) / float(mod_lines)) if mod_lines else 0
                 writer.writerow([name, diffs, comments, mod_lines, "{:0.4f}".format(ratio)])
 
+    def _write_top_k_ratios(self, writer):
+        """Writes the metrics of the top developers.
+
+        Diffs, comments, modified lines and their ratio are exact. The top
+        developers are selected by the estimated diffs of the SpaceSaving
+        summary, which overestimate the true diff count by at most the
+        estimated diffs error. Any developer missing from the summary has at
+        most the diff error bound diffs. A developer is guaranteed to be
+        within the top K when its estimated diffs minus error is at least the
+        estimated diffs of the (K+1)-th developer.
+        """
+        hitters = self._heavy_hitters
+        writer.writerow(["Top developers reported", self._top_k])
+        writer.writerow(["Developers tracked", hitters.capacity])
+        writer.writerow(["Total diffs", hitters.total])
+        writer.writerow(["Diff error bound", hitters.error_bound()])
+        writer.writerow(["Developer", "Diffs", "Comments", "Modified Lines",
+                         "Ratio (Comments/Modified Lines)", "Estimated Diffs",
+                         "Estimated Diffs Error", "Guaranteed Top K"])
+        for dev, (_, count, error) in zip(self._developers, self._candidates):
+            diffs = dev.diff_count()
+            comments = dev.comment_count()
+            mod_lines = dev.mod_line_count()
+            ratio = (float(comments) / float(mod_lines)) if mod_lines else 0
+            guaranteed = "Yes" if count - error >= self._guarantee_threshold else "No"
+            writer.writerow([dev.name, diffs, comments, mod_lines,
+                             "{:0.4f}".format(ratio), count, error, guaranteed])
+
     def _pairwise(self, iterable):
         it = iter(iterable)
         a = next(it, None)
@@ -317,6 +427,151 @@ class Diff:
                               re.DOTALL | re.MULTILINE)
         return comments
 
+class DevSummary:
+    """Counts diffs, comments and modified lines of a developer without
+    storing the diffs."""
+
+    def __init__(self, name, email):
+        """DevSummary Init.
+        :param str name: name of developer
+        :param str email: email of developer
+        """
+        self._name = name
+        self._email = email
+        self._diff_count = 0
+        self._comment_count = 0
+        self._mod_line_count = 0
+
+    @property
+    def name(self):
+        """Name of developer as str."""
+        return self._name
+
+    @property
+    def email(self):
+        """Email of developer as str."""
+        return self._email
+
+    def add_diff(self, diff_obj):
+        """Count a processed Diff against this developer.
+        :param Diff diff_obj: diff made by this developer
+        """
+        self._diff_count += 1
+        self._comment_count += len(diff_obj.comments)
+        self._mod_line_count += len(diff_obj.modified_lines)
+
+    def diff_count(self):
+        """Number of diffs made by the developer.
+        :returns: int
+        """
+        return self._diff_count
+
+    def comment_count(self):
+        """Number of comments within the diffs.
+        :returns: int
+        """
+        return self._comment_count
+
+    def mod_line_count(self):
+        """Number of lines updated or added within the diffs.
+        :returns: int
+        """
+        return self._mod_line_count
+
+class SpaceSaving:
+    """Space-Saving heavy hitters summary of developers ranked by diff count.
+
+    At most `capacity` developers are tracked with an estimated diff count
+    and error. When a new developer arrives and the table is full, the
+    developer with the fewest diffs is evicted and the newcomer inherits its
+    diff count as error, so the true diff count lies between count - error
+    and count. Any developer that is not tracked has at most
+    total / capacity diffs.
+
+    The developer with the fewest diffs is found with a min-heap holding one
+    (count, name) entry per tracked developer. Entries are not updated when a
+    diff is added, instead stale entries are refreshed as they reach the top
+    of the heap.
+    """
+
+    def __init__(self, capacity):
+        """SpaceSaving Init.
+        :param int capacity: maximum number of developers to track
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be a positive integer")
+        self._capacity = capacity
+        self._counts = {}
+        self._errors = {}
+        self._heap = []
+        self._total = 0
+
+    @property
+    def capacity(self):
+        """Maximum number of developers tracked."""
+        return self._capacity
+
+    @property
+    def total(self):
+        """Number of diffs counted over all developers."""
+        return self._total
+
+    def add(self, name):
+        """Count a diff against the developer with name."""
+        self._total += 1
+        if name in self._counts:
+            self._counts[name] += 1
+            return
+
+        error = 0
+        if len(self._counts) >= self._capacity:
+            evicted = self._min_name()
+            heapq.heappop(self._heap)
+            error = self._counts.pop(evicted)
+            del self._errors[evicted]
+        self._counts[name] = error + 1
+        self._errors[name] = error
+        heapq.heappush(self._heap, (error + 1, name))
+
+    def error_bound(self):
+        """Maximum diff count of any developer that is not tracked.
+
+        This is the fewest diffs of any tracked developer once the summary is
+        full, which is at most total / capacity.
+        :returns: int
+        """
+        if len(self._counts) < self._capacity:
+            return 0
+        return self._counts[self._min_name()]
+
+    def guarantee_threshold(self, ranked, k):
+        """Estimated diffs a developer must be guaranteed to be in the top k.
+
+        A developer whose count - error is at least this threshold is
+        guaranteed to be within the top k developers. This is the count of the
+        (k+1)-th developer, or the error bound if fewer are tracked.
+        :param list ranked: summaries() of this SpaceSaving
+        :param int k: number of top developers
+        :returns: int
+        """
+        return ranked[k][1] if len(ranked) > k else self.error_bound()
+
+    def summaries(self):
+        """List of tracked (name, count, error), most diffs first.
+
+        Ties are ordered by lowest error, then by name.
+        """
+        return sorted(((name, count, self._errors[name])
+                       for name, count in self._counts.items()),
+                      key=lambda s: (-s[1], s[2], s[0]))
+
+    def _min_name(self):
+        """Refresh stale heap entries and return the name on top."""
+        while True:
+            count, name = self._heap[0]
+            if self._counts[name] == count:
+                return name
+            heapq.heapreplace(self._heap, (self._counts[name], name))
 
 
 script_desc = "Extracts C++ comments from developers generated over the " \
@@ -328,8 +583,16 @@ if __name__ == "__main__":
                         help="Path of the repository to extract comments.")
     parser.add_argument("-d", "--directory", type=str, default=".",
                         help="Directory of where to store the .csv files.")
+    parser.add_argument("-k", "--top-k", type=int, default=None,
+                        help="Only report the top K developers by diff count, "
+                             "selected with a fixed size heavy hitters summary. "
+                             "Their metrics are exact, but the selection may "
+                             "miss a top developer, see 'Guaranteed Top K'.")
     args = parser.parse_args()
 
+    if args.top_k is not None and args.top_k < 1:
+        parser.error("--top-k must be a positive integer")
+
     if not os.path.isdir(args.directory):
         print("{} is not a directory".format(args.directory))
         exit(1)
@@ -340,7 +603,7 @@ if __name__ == "__main__":
     log_filepath = os.path.join(args.directory, log_filename)
     logger = config_logger(log_filepath, LOG_LEVEL)
 
-    processor = DevProcessor(args.repository)
+    processor = DevProcessor(args.repository, args.top_k)
     processor.process_devs()
 
     print("")
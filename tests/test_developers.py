@@ -1,8 +1,12 @@
 from __future__ import absolute_import
 
 import unittest
+import csv
+import shutil
+import tempfile
 
-from extract_cpp_comments import Diff, Developer, DevProcessor
+from extract_cpp_comments import Diff, Developer, DevProcessor, \
+    DevSummary, SpaceSaving
 import os
 
 
@@ -157,6 +161,79 @@ class TestDeveloper(unittest.TestCase):
         self.assertEqual(self.DEV.mod_line_count(), 9)
 
 
+class TestDevSummary(unittest.TestCase):
+
+    DIFF = "+price = price * 1.05 // updated inline comment\n" \
+           "+price = price * 2"
+
+    def test_add_diff(self):
+        dev = DevSummary(name="Joe Bob", email="JoeBob@Billy.com")
+        dev.add_diff(Diff(self.DIFF))
+        dev.add_diff(Diff(self.DIFF))
+        self.assertEqual(dev.name, "Joe Bob")
+        self.assertEqual(dev.email, "JoeBob@Billy.com")
+        self.assertEqual(dev.diff_count(), 2)
+        self.assertEqual(dev.comment_count(), 2)
+        self.assertEqual(dev.mod_line_count(), 4)
+
+
+class TestSpaceSaving(unittest.TestCase):
+
+    def test_exact_within_capacity(self):
+        hitters = SpaceSaving(2)
+        hitters.add("Joe")
+        hitters.add("Joe")
+        hitters.add("Sam")
+        ranked = hitters.summaries()
+        self.assertEqual(ranked, [("Joe", 2, 0), ("Sam", 1, 0)])
+        self.assertEqual(hitters.total, 3)
+        self.assertEqual(hitters.error_bound(), 1)
+        self.assertEqual(hitters.guarantee_threshold(ranked, 2), 1)
+        self.assertEqual(hitters.guarantee_threshold(ranked, 1), 1)
+
+    def test_eviction(self):
+        hitters = SpaceSaving(2)
+        for _ in range(3):
+            hitters.add("Joe")
+        hitters.add("Sam")
+        hitters.add("Lewis")
+        ranked = hitters.summaries()
+        self.assertEqual(ranked, [("Joe", 3, 0), ("Lewis", 2, 1)])
+        self.assertEqual(hitters.error_bound(), 2)
+        self.assertEqual(hitters.guarantee_threshold(ranked, 1), 2)
+
+    def test_returning_developer(self):
+        hitters = SpaceSaving(2)
+        hitters.add("A")
+        for _ in range(5):
+            hitters.add("X")
+        for _ in range(11):
+            hitters.add("Y")
+        hitters.add("A")
+        ranked = hitters.summaries()
+        # A returns in place of X and inherits its 5 diffs as error.
+        self.assertEqual(ranked, [("Y", 12, 1), ("A", 6, 5)])
+        # X is no longer tracked and had 5 diffs.
+        self.assertEqual(hitters.error_bound(), 6)
+        self.assertLessEqual(hitters.error_bound(),
+                             hitters.total // hitters.capacity)
+        self.assertEqual(hitters.guarantee_threshold(ranked, 1), 6)
+
+    def test_untracked_bound(self):
+        hitters = SpaceSaving(2)
+        hitters.add("A")
+        hitters.add("B")
+        hitters.add("C")
+        ranked = hitters.summaries()
+        self.assertEqual(ranked, [("C", 2, 1), ("B", 1, 0)])
+        # A is no longer tracked and had at most the error bound diffs.
+        self.assertEqual(hitters.error_bound(), 1)
+        self.assertEqual(hitters.guarantee_threshold(ranked, 2), 1)
+
+    def test_invalid_capacity(self):
+        self.assertRaises(ValueError, SpaceSaving, 0)
+
+
 class TestDevProcessor(unittest.TestCase):
 
     def test_process_devs(self):
@@ -187,6 +264,66 @@ class TestDevProcessor(unittest.TestCase):
 
         processor.export_dev_csv("test_dev_comments.csv")
 
+    def _export_top_k_rows(self, processor):
+        """Return the rows of the stats .csv, checking no comments .csv."""
+        directory = tempfile.mkdtemp()
+        try:
+            processor.export_dev_csv(directory)
+            self.assertEqual(os.listdir(directory), [])
+
+            processor.export_comment_ratio(directory)
+            filepath = os.path.join(directory, "test_repo_repo_stats.csv")
+            with open(filepath) as f:
+                return list(csv.reader(f))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_process_devs_top_k(self):
+        repo_path = os.path.join(os.getcwd(), "test_repo")
+        processor = DevProcessor(repo_path, top_k=1)
+        processor.process_devs()
+        devs = processor.developers
+        self.assertEqual(len(devs), 1)
+
+        billy = devs[0]
+        self.assertEqual(billy.name, "Billy Bob")
+        self.assertEqual(billy.diff_count(), 2)
+        self.assertEqual(billy.comment_count(), 4)
+
+        rows = self._export_top_k_rows(processor)
+        self.assertEqual(rows[3:], [
+            ["Top developers reported", "1"],
+            ["Developers tracked", "10"],
+            ["Total diffs", "4"],
+            ["Diff error bound", "0"],
+            ["Developer", "Diffs", "Comments", "Modified Lines",
+             "Ratio (Comments/Modified Lines)", "Estimated Diffs",
+             "Estimated Diffs Error", "Guaranteed Top K"],
+            ["Billy Bob", "2", "4", "14", "0.2857", "2", "0", "Yes"]])
+
+    def test_process_devs_top_k_eviction(self):
+        repo_path = os.path.join(os.getcwd(), "test_repo")
+        processor = DevProcessor(repo_path, top_k=1, top_k_capacity=2)
+        processor.process_devs()
+
+        # Billy is evicted by Lewis, then returns in place of Sam, but his
+        # reported metrics are still counted over all of his diffs.
+        rows = self._export_top_k_rows(processor)
+        self.assertEqual(rows[3:], [
+            ["Top developers reported", "1"],
+            ["Developers tracked", "2"],
+            ["Total diffs", "4"],
+            ["Diff error bound", "2"],
+            ["Developer", "Diffs", "Comments", "Modified Lines",
+             "Ratio (Comments/Modified Lines)", "Estimated Diffs",
+             "Estimated Diffs Error", "Guaranteed Top K"],
+            ["Billy Bob", "2", "4", "14", "0.2857", "2", "1", "No"]])
+
+    def test_invalid_top_k(self):
+        repo_path = os.path.join(os.getcwd(), "test_repo")
+        self.assertRaises(ValueError, DevProcessor, repo_path, 0)
+        self.assertRaises(ValueError, DevProcessor, repo_path, 2, 1)
+
 
 if __name__ == '__main__':
     unittest.main()